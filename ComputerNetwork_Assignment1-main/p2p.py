@@ -5,18 +5,67 @@ import sys
 import json
 import time
 import socket
+import selectors
 import threading
 import argparse
+import hashlib
+from collections import OrderedDict, deque
+from functools import lru_cache
 import http.client
 import mimetypes
-from urllib.parse import urlencode, urlparse
+from urllib.parse import urlencode, urlparse, parse_qsl
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 LINE_SEP = b"\n"
+RECV_SIZE = 65536  # bytes read per recv_into on a peer socket
+SOCK_BUF = 256 * 1024  # kernel send/receive buffer requested for peer sockets
+MSG_DONTWAIT = getattr(socket, "MSG_DONTWAIT", 0)  # per-call non-blocking send (POSIX)
+WATCH_TIMEOUT = 25  # seconds the server may hold a /channel/watch long-poll open
+SYNC_MAX_WAIT_MS = 30000  # upper bound for a /sync long-poll (X-Wait-Ms)
+CHAT_HISTORY = 10000  # messages kept per channel for /sync
+BRIDGE_IDLE_TIMEOUT = 60  # seconds an idle keep-alive UI connection is held
+STATIC_MEM_MAX = 256 * 1024  # UI files up to this size are kept in memory
+STATIC_RECHECK = 2.0  # seconds between mtime checks of a cached UI file
+STATIC_CACHE_SIZE = 64  # UI files kept in the cache, least recently used evicted first
 
 def now():
     return time.time()
 
+# JSON helpers for the peer wire protocol, on bytes: orjson when installed, stdlib json otherwise
+if orjson is not None:
+    jdumps = orjson.dumps
+    jloads = orjson.loads
+else:
+    def jdumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def jloads(data):
+        return json.loads(data)
+
+def tune_socket(s):
+    """Peer socket options: keepalive, no Nagle delay for small chat lines, bigger buffers."""
+    for level, opt, val in ((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                            (socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF),
+                            (socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF)):
+        try:
+            s.setsockopt(level, opt, val)
+        except OSError:
+            pass
+
+@lru_cache(maxsize=64)
+def _msg_prefix(chan: str, frm: str) -> bytes:
+    # constant head of a "msg" line; only ts and text change per message
+    return b'{"type":"msg","chan":' + jdumps(chan) + b',"from":' + jdumps(frm) + b',"ts":'
+
+# JSON-escaped message text; chats repeat short lines ("ok", "ack") a lot
+_jtext = lru_cache(maxsize=256)(jdumps)
+
 def guess_mime(path: str) -> str:
     mt, _ = mimetypes.guess_type(path)
     return mt or "application/octet-stream"
@@ -59,16 +108,47 @@ class P2PPeer:
         self.cookie = cookie
 
         # ---- P2P sockets: {peer_id -> socket} ----
+        # Copy-on-write: writers build a new dict under conns_lock and swap it
+        # in, so readers (broadcast, /channel/join) never take the lock.
         self.conns = {}
         self.conns_lock = threading.Lock()
+        # Reverse map {socket -> peer_id} so a drop doesn't scan conns
+        self._sock_pid = {}
+        # bumped on every change to conns; keys the cached /channel/join peers JSON
+        self._conns_ver = 0
+        self._peers_json = (-1, b"{}")
+
+        # ---- One selector loop thread reads the listener and all peer sockets ----
+        self._sel = selectors.DefaultSelector()
+        # only that thread reads, so one preallocated receive buffer serves every socket
+        self._rbuf = memoryview(bytearray(RECV_SIZE))
+        # Line handlers by message "type", looked up once per line in _on_line
+        self._handlers = {"msg": self._on_msg, "hello": self._on_hello}
+        # Bytes a non-blocking send couldn't place yet: {socket -> bytearray},
+        # flushed by the selector loop when the socket turns writable
+        self._pending = {}
+        self._pending_lock = threading.Lock()
 
         # ---- Simple in-memory channel store for bridge/UI ----
-        # chats[channel] = {"seq": int, "messages": [ {seq, from, text, ts}, ... ]}
+        # chats[channel] = {"seq": int, "messages": deque([ {seq, from, text, ts}, ... ])}
+        # seqs are contiguous, so messages[i] has seq == seq - len(messages) + 1 + i
         self.chats = {}
         self.chats_lock = threading.Lock()
+        # signalled on every stored message; /sync long-polls wait on it
+        self._msg_cv = threading.Condition(self.chats_lock)
+
+        # Static UI files, LRU: {path -> (checked_at, mtime_ns, mime, size, etag, data|None)}
+        self._static_cache = OrderedDict()
+        self._static_lock = threading.Lock()
+
+        # Persistent keep-alive connection to the central server, shared by all REST calls
+        self._http = None
+        self._http_lock = threading.Lock()
 
         # runtime flags
         self.stop = False
+        # set together with stop; periodic waits use it so shutdown wakes them at once
+        self._stop_ev = threading.Event()
 
         # ---- HTTP bridge ----
         self.bridge_host = bridge_host
@@ -77,9 +157,20 @@ class P2PPeer:
 
     # =============== Central server helpers ===============
     def _conn(self):
-        if self.is_https:
-            return http.client.HTTPSConnection(self.host, self.port, timeout=10)
-        return http.client.HTTPConnection(self.host, self.port, timeout=10)
+        if self._http is None:
+            if self.is_https:
+                self._http = http.client.HTTPSConnection(self.host, self.port, timeout=WATCH_TIMEOUT + 10)
+            else:
+                self._http = http.client.HTTPConnection(self.host, self.port, timeout=WATCH_TIMEOUT + 10)
+        return self._http
+
+    def _close_http(self):
+        if self._http is not None:
+            try:
+                self._http.close()
+            except Exception:
+                pass
+            self._http = None
 
     def _post(self, path, form):
         """POST to central server; returns (status_code, json_or_None)."""
@@ -88,23 +179,28 @@ class P2PPeer:
             "Content-Type": "application/x-www-form-urlencoded",
             "Cookie": self.cookie,
             "User-Agent": "P2P-CLI/1.0",
-            "Connection": "close",
+            "Connection": "keep-alive",
         }
-        c = self._conn()
-        try:
-            c.request("POST", path, body=body, headers=headers)
-            r = c.getresponse()
-            data = r.read()
-            status = r.status
-        finally:
-            try:
-                c.close()
-            except Exception:
-                pass
+        with self._http_lock:
+            # reuse the kept-alive connection; if the server dropped it, reopen once
+            for attempt in range(2):
+                c = self._conn()
+                try:
+                    c.request("POST", path, body=body, headers=headers)
+                    r = c.getresponse()
+                    data = r.read()
+                    status = r.status
+                    break
+                except (http.client.BadStatusLine, ConnectionError):
+                    self._close_http()
+                    if attempt:
+                        raise
+                except Exception:
+                    self._close_http()
+                    raise
 
         try:
-            txt = data.decode("utf-8", errors="ignore")
-            js = json.loads(txt) if txt else None
+            js = jloads(data) if data else None
         except Exception:
             js = None
         return status, js
@@ -145,8 +241,28 @@ class P2PPeer:
         t.start()
 
     def _refresh_loop(self):
+        # Long-poll /channel/watch so one request covers a whole quiet period;
+        # fall back to polling /channel/join every 2s if the server lacks it
+        # (404). Other failures, e.g. a "busy" server, poll once and retry.
+        version = 0
+        use_watch = True
         while not self.stop:
             try:
+                if use_watch:
+                    st, js = self._post("/channel/watch", {
+                        "name": self.channel,
+                        "peer_id": self.peer_id,
+                        "since": str(version),
+                        "timeout": str(WATCH_TIMEOUT),
+                    })
+                    if st == 200 and js and js.get("ok") and "version" in js:
+                        version = int(js["version"])
+                        for pid, info in (js.get("peers") or {}).items():
+                            if pid != self.peer_id and self.peer_id < pid:
+                                self._ensure_connected(pid, info.get("ip", "127.0.0.1"), int(info.get("port", 0)))
+                        continue
+                    if st == 404 or (js and js.get("ok") and "version" not in js):
+                        use_watch = False
                 st, js = self._post("/channel/join", {"name": self.channel, "peer_id": self.peer_id})
                 if js and "peers" in js:
                     for pid, info in js["peers"].items():
@@ -157,65 +273,84 @@ class P2PPeer:
             except Exception:
                 # silent retry
                 pass
-            time.sleep(2.0)
+            self._stop_ev.wait(2.0)
 
     # =============== P2P listener & connectors ===============
     def start_listener(self):
-        def serve():
-            srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            try:
-                srv.bind((self.listen_ip, self.listen_port))
-                srv.listen(20)
-                print(f"[{self.peer_id}] listening on {self.listen_ip}:{self.listen_port}")
-                while not self.stop:
+        srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            srv.bind((self.listen_ip, self.listen_port))
+            srv.listen(20)
+        except Exception:
+            srv.close()
+            raise
+        print(f"[{self.peer_id}] listening on {self.listen_ip}:{self.listen_port}")
+        srv.setblocking(False)  # _accept drains the backlog until it would block
+        self._sel.register(srv, selectors.EVENT_READ, None)
+        threading.Thread(target=self._io_loop, args=(srv,), daemon=True).start()
+
+    def _io_loop(self, srv):
+        # one thread: accept on the listener, read lines on every peer socket
+        try:
+            while not self.stop:
+                for key, mask in self._sel.select(timeout=0.5):
+                    if key.fileobj is srv:
+                        self._accept(srv)
+                        continue
                     try:
-                        s, addr = srv.accept()
-                        try:
-                            s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-                            s.settimeout(None)  # blocking recv
-                        except Exception:
-                            pass
-                        threading.Thread(target=self._handle_conn, args=(s, f"in:{addr}"), daemon=True).start()
+                        if mask & selectors.EVENT_WRITE and not self._flush(key.fileobj, key.data):
+                            continue
+                        if mask & selectors.EVENT_READ:
+                            self._handle_conn(key.fileobj, key.data)
                     except Exception:
-                        break
-            finally:
-                try:
-                    srv.close()
-                except Exception:
-                    pass
-        threading.Thread(target=serve, daemon=True).start()
+                        # a malformed peer must not take the whole loop down
+                        self._drop_conn(key.fileobj)
+        finally:
+            try:
+                self._sel.unregister(srv)
+            except Exception:
+                pass
+            try:
+                srv.close()
+            except Exception:
+                pass
+
+    def _accept(self, srv):
+        while True:
+            try:
+                s, addr = srv.accept()
+            except Exception:
+                return
+            tune_socket(s)
+            s.settimeout(None)  # blocking socket; only read when the selector says so
+            self._sel.register(s, selectors.EVENT_READ, bytearray())
 
     def _ensure_connected(self, peer_key, ip, port):
         if not port:
             return
-        with self.conns_lock:
-            if peer_key in self.conns:
-                return
+        if peer_key in self.conns:
+            return
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            try:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-            except Exception:
-                pass
+            tune_socket(s)
             # short timeout only for connect
             s.settimeout(3.0)
             s.connect((ip, port))
             s.settimeout(None)
 
-            # remember
-            with self.conns_lock:
-                self.conns[peer_key] = s
-
             # send hello so receiver can map socket -> our peer_id
-            hello = (json.dumps({"type": "hello", "from": self.peer_id, "chan": self.channel}) + "\n").encode("utf-8")
+            hello = jdumps({"type": "hello", "from": self.peer_id, "chan": self.channel}) + LINE_SEP
             try:
                 s.sendall(hello)
             except Exception:
                 pass
 
-            threading.Thread(target=self._handle_conn, args=(s, f"out:{peer_key}"), daemon=True).start()
+            # register before publishing in conns: _send_line may queue bytes
+            # for s as soon as it is visible, and only the selector flushes them
+            self._sel.register(s, selectors.EVENT_READ, bytearray())
+            self._set_conn(peer_key, s)
             print(f"[{self.peer_id}] connected to {peer_key} at {ip}:{port}")
         except Exception:
             try:
@@ -223,98 +358,231 @@ class P2PPeer:
             except Exception:
                 pass
 
-    def _handle_conn(self, s, tag):
-        buf = b""
+    def _handle_conn(self, s, buf):
+        # called by the selector loop when s is readable; buf holds the partial line
         try:
-            while True:
-                chunk = s.recv(4096)
-                if not chunk:
-                    break
-                buf += chunk
-                while True:
-                    if LINE_SEP in buf:
-                        line, buf = buf.split(LINE_SEP, 1)
-                        self._on_line(line, s)
-                    else:
-                        break
+            n = s.recv_into(self._rbuf)
         except Exception:
-            pass
-        finally:
-            # remove if present
-            with self.conns_lock:
-                for k, v in list(self.conns.items()):
-                    if v is s:
-                        del self.conns[k]
-                        break
+            n = 0
+        if not n:
+            self._drop_conn(s)
+            return
+        # bytes before scan were already searched and hold no newline
+        scan = len(buf)
+        buf += self._rbuf[:n]
+        start = 0
+        nl = buf.find(LINE_SEP, scan)
+        while nl >= 0:
+            self._on_line(bytes(buf[start:nl]), s)
+            start = nl + 1
+            nl = buf.find(LINE_SEP, start)
+        if start:
+            del buf[:start]
+
+    def _set_conn(self, peer_key, s):
+        with self.conns_lock:
+            conns = dict(self.conns)
+            conns[peer_key] = s
+            self.conns = conns
+            self._sock_pid[s] = peer_key
+            self._conns_ver += 1
+
+    def _send_line(self, s, raw: bytes):
+        # never block the caller on a slow peer: whatever doesn't fit in the
+        # socket buffer now is queued and written from the selector loop
+        with self._pending_lock:
+            pend = self._pending.get(s)
+            if pend is not None:
+                pend += raw
+                return
             try:
-                s.close()
-            except Exception:
+                n = s.send(raw, MSG_DONTWAIT)
+            except BlockingIOError:
+                n = 0
+            except OSError:
+                return  # the selector loop sees the broken socket and drops it
+            if n < len(raw):
+                self._pending[s] = bytearray(raw[n:])
+                mask = selectors.EVENT_READ | selectors.EVENT_WRITE
+                try:
+                    self._sel.modify(s, mask, self._sel.get_key(s).data)
+                except KeyError:
+                    # not registered (yet): register it so the backlog still gets flushed
+                    try:
+                        self._sel.register(s, mask, bytearray())
+                    except (KeyError, ValueError):
+                        pass
+                except ValueError:
+                    pass
+
+    def _flush(self, s, buf) -> bool:
+        """Write queued bytes to a writable socket; False if the socket was dropped."""
+        with self._pending_lock:
+            pend = self._pending.get(s)
+            try:
+                if pend:
+                    del pend[:s.send(pend, MSG_DONTWAIT)]
+                    if pend:
+                        return True  # still backed up, keep waiting for writable
+                self._pending.pop(s, None)
+                self._sel.modify(s, selectors.EVENT_READ, buf)
+                return True
+            except BlockingIOError:
+                return True
+            except (KeyError, ValueError):
+                return True  # already unregistered
+            except OSError:
                 pass
+        self._drop_conn(s)
+        return False
+
+    def _drop_conn(self, s):
+        try:
+            self._sel.unregister(s)
+        except Exception:
+            pass
+        with self._pending_lock:
+            self._pending.pop(s, None)
+        # remove if present
+        with self.conns_lock:
+            pid = self._sock_pid.pop(s, None)
+            if pid is not None and self.conns.get(pid) is s:
+                conns = dict(self.conns)
+                del conns[pid]
+                self.conns = conns
+                self._conns_ver += 1
+        try:
+            s.close()
+        except Exception:
+            pass
 
     def _on_line(self, line_bytes, sock):
         try:
-            txt = line_bytes.decode("utf-8", errors="ignore")
-            js = json.loads(txt)
+            js = jloads(line_bytes)
         except Exception:
             return
-
-        typ = js.get("type")
-        if typ == "hello":
-            pid = js.get("from")
-            if pid:
-                with self.conns_lock:
-                    self.conns[pid] = sock
+        if not isinstance(js, dict):
             return
 
-        if typ == "msg":
-            frm = js.get("from", "?")
-            text = js.get("text", "")
-            chan = js.get("chan", self.channel)
-            ts = js.get("ts", now())
-            print(f"\r[{frm}] {text}")
-            # mirror into local UI store so the browser on this peer also sees it
-            self._store_message(chan, frm, text, ts)
-            return
+        kind = js.get("type")
+        handler = self._handlers.get(kind) if isinstance(kind, str) else None
+        if handler is not None:
+            handler(js, sock)
+
+    def _on_hello(self, js, sock):
+        pid = js.get("from")
+        if pid and isinstance(pid, str):
+            self._set_conn(pid, sock)
+
+    def _on_msg(self, js, sock):
+        frm = js.get("from", "?")
+        text = js.get("text", "")
+        chan = js.get("chan", self.channel)
+        ts = js.get("ts", now())
+        print(f"\r[{frm}] {text}")
+        # mirror into local UI store so the browser on this peer also sees it
+        self._ingest(chan, frm, text, ts)
+
+    # =============== Static UI files ===============
+    def _static_entry(self, file_path: str):
+        """Return the cache entry for a UI file, re-stat'ing it at most every STATIC_RECHECK s."""
+        with self._static_lock:
+            ent = self._static_cache.get(file_path)
+            if ent is not None:
+                self._static_cache.move_to_end(file_path)
+        t = now()
+        if ent is not None and t - ent[0] < STATIC_RECHECK:
+            return ent
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            with self._static_lock:
+                self._static_cache.pop(file_path, None)
+            return None
+        if ent is not None and ent[1] == st.st_mtime_ns and ent[3] == st.st_size:
+            ent = (t,) + ent[1:]
+        elif st.st_size <= STATIC_MEM_MAX:
+            with open(file_path, "rb") as f:
+                data = f.read()
+            etag = '"%s"' % hashlib.blake2b(data, digest_size=8).hexdigest()
+            ent = (t, st.st_mtime_ns, guess_mime(file_path), len(data), etag, data)
+        else:
+            # too big to keep: validate by mtime/size and stream it with sendfile
+            etag = '"%x-%x"' % (st.st_mtime_ns, st.st_size)
+            ent = (t, st.st_mtime_ns, guess_mime(file_path), st.st_size, etag, None)
+        with self._static_lock:
+            self._static_cache[file_path] = ent
+            self._static_cache.move_to_end(file_path)
+            if len(self._static_cache) > STATIC_CACHE_SIZE:
+                self._static_cache.popitem(last=False)
+        return ent
 
     # =============== Message store for UI ===============
     def _ensure_channel(self, name: str):
         with self.chats_lock:
             if name not in self.chats:
-                self.chats[name] = {"seq": 0, "messages": []}
+                self.chats[name] = {"seq": 0, "messages": deque(maxlen=CHAT_HISTORY)}
 
-    def _store_message(self, name: str, frm: str, text: str, ts: float = None):
+    def _ingest(self, name: str, frm: str, text: str, ts: float = None, broadcast: bool = False):
+        """Store a message for the UI (one chats_lock round) and, for our own, send it to every peer.
+
+        Messages whose fields have the wrong type (e.g. from a peer's JSON) are ignored.
+        """
         ts = ts if ts is not None else now()
-        self._ensure_channel(name)
+        if not (isinstance(name, str) and isinstance(frm, str) and isinstance(text, str)
+                and isinstance(ts, (int, float))):
+            return None
         with self.chats_lock:
-            seq = self.chats[name]["seq"] + 1
-            self.chats[name]["seq"] = seq
-            self.chats[name]["messages"].append({
+            chat = self.chats.get(name)
+            if chat is None:
+                chat = self.chats[name] = {"seq": 0, "messages": deque(maxlen=CHAT_HISTORY)}
+            seq = chat["seq"] = chat["seq"] + 1
+            chat["messages"].append({
                 "seq": seq, "from": frm, "text": text, "ts": ts
             })
-            return seq
+            self._msg_cv.notify_all()
+
+        if broadcast:
+            raw = b"".join((_msg_prefix(name, frm), repr(ts).encode(), b',"text":', _jtext(text), b"}", LINE_SEP))
+            for s in self.conns.values():
+                self._send_line(s, raw)
+        return seq
 
     def _get_messages_after(self, name: str, after_seq: int):
         self._ensure_channel(name)
         with self.chats_lock:
-            return [m for m in self.chats[name]["messages"] if m["seq"] > after_seq]
+            return self._tail(self.chats[name], after_seq)
+
+    def _wait_messages_after(self, name: str, after_seq: int, timeout: float):
+        """Block up to ``timeout`` seconds until ``name`` has a message past ``after_seq``."""
+        self._ensure_channel(name)
+        with self._msg_cv:
+            self._msg_cv.wait_for(lambda: self.stop or self.chats[name]["seq"] > after_seq, timeout)
+            return self._tail(self.chats[name], after_seq)
+
+    @staticmethod
+    def _tail(chat: dict, after_seq: int):
+        # index straight to the first message past after_seq; caller holds chats_lock
+        msgs = chat["messages"]
+        n = len(msgs)
+        start = max(n - max(chat["seq"] - after_seq, 0), 0)
+        return [msgs[i] for i in range(start, n)]
+
+    def _connected_peers_json(self) -> bytes:
+        """Encoded ``{peer_id: {"connected": true}}`` map, rebuilt only after conns changes."""
+        ver, raw = self._peers_json
+        if ver == self._conns_ver:
+            return raw
+        # version first: a racing swap only makes the next call rebuild again
+        ver = self._conns_ver
+        raw = json.dumps({k: {"connected": True} for k in self.conns}).encode("utf-8")
+        self._peers_json = (ver, raw)
+        return raw
 
     # =============== Sending ===============
     def send_all(self, text: str):
-        payload = {"type": "msg", "chan": self.channel, "from": self.peer_id, "text": text, "ts": now()}
-        raw = (json.dumps(payload) + "\n").encode("utf-8")
-
-        # Store locally for the UI
-        self._store_message(self.channel, self.peer_id, text, payload["ts"])
-
-        # Broadcast to peers
-        with self.conns_lock:
-            targets = list(self.conns.values())
-        for s in targets:
-            try:
-                s.sendall(raw)
-            except Exception:
-                pass
-
+        # Store locally for the UI and broadcast to peers
+        self._ingest(self.channel, self.peer_id, text, broadcast=True)
         print(f"[{self.peer_id}] {text}")
 
     # =============== HTTP bridge (UI) ===============
@@ -326,31 +594,28 @@ class P2PPeer:
 
         class Handler(BaseHTTPRequestHandler):
             server_version = "P2PBridge/1.0"
+            # keep-alive: a browser reuses one connection (and one server thread)
+            # for its /sync long-polls instead of a fresh thread per request
+            protocol_version = "HTTP/1.1"
+            timeout = BRIDGE_IDLE_TIMEOUT
 
             # --- helpers ---
             def _read_body(self) -> bytes:
                 try:
                     ln = int(self.headers.get("Content-Length", "0"))
                 except Exception:
-                    ln = 0
+                    ln = -1
+                if ln < 0:
+                    # the body cannot be framed, so the connection cannot be reused
+                    self.close_connection = True
                 if ln <= 0:
                     return b""
                 return self.rfile.read(ln)
 
             def _form(self) -> dict:
+                # parse application/x-www-form-urlencoded (with proper %XX decoding)
                 raw = self._read_body().decode("utf-8", errors="ignore")
-                # parse application/x-www-form-urlencoded
-                args = {}
-                for pair in raw.split("&"):
-                    if not pair:
-                        continue
-                    if "=" in pair:
-                        k, v = pair.split("=", 1)
-                    else:
-                        k, v = pair, ""
-                    # minimal unquote (+ -> space handled by form on UI anyway)
-                    args[k] = v.replace("+", " ")
-                return args
+                return dict(parse_qsl(raw, keep_blank_values=True))
 
             def _send(self, code: int, headers: dict, body: bytes):
                 self.send_response(code)
@@ -379,38 +644,54 @@ class P2PPeer:
 
                 # static file under ui_root
                 file_path = os.path.join(peer.ui_root, path.lstrip("/"))
-                if not os.path.isfile(file_path):
+                try:
+                    ent = peer._static_entry(file_path) if os.path.isfile(file_path) else None
+                except Exception:
+                    return self._send(404, {"Content-Type": "text/plain", "Content-Length": "9"}, b"Not found")
+                if ent is None:
                     body = (f"<html><body><h3>P2P Bridge for {peer.peer_id}</h3>"
                             f"<p>Try <a href='/chat.html'>/chat.html</a>.</p></body></html>").encode("utf-8")
                     return self._send(200, {"Content-Type": "text/html; charset=utf-8",
                                              "Content-Length": str(len(body))}, body)
-                try:
-                    with open(file_path, "rb") as f:
-                        data = f.read()
-                    mime = guess_mime(file_path)
-                    headers = {"Content-Type": mime, "Content-Length": str(len(data))}
-                    # Auto set cookie for convenience (so POSTs include Cookie)
-                    if "auth=true" not in (self.headers.get("Cookie", "")):
-                        headers["Set-Cookie"] = "auth=true; Path=/"
+                _, _, mime, size, etag, data = ent
+                headers = {"ETag": etag, "Cache-Control": "max-age=60"}
+                # Auto set cookie for convenience (so POSTs include Cookie)
+                if "auth=true" not in (self.headers.get("Cookie", "")):
+                    headers["Set-Cookie"] = "auth=true; Path=/"
+                if self.headers.get("If-None-Match") == etag:
+                    headers["Content-Length"] = "0"
+                    return self._send(304, headers, b"")
+                headers["Content-Type"] = mime
+                headers["Content-Length"] = str(size)
+                if data is not None:
                     return self._send(200, headers, data)
+                try:
+                    f = open(file_path, "rb")
                 except Exception:
-                    return self._send(404, {"Content-Type": "text/plain"}, b"Not found")
+                    return self._send(404, {"Content-Type": "text/plain", "Content-Length": "9"}, b"Not found")
+                with f:
+                    self._send(200, headers, b"")
+                    # kernel copies the file straight to the socket (sendfile(2))
+                    try:
+                        self.connection.sendfile(f, 0, size)
+                    except Exception:
+                        self.close_connection = True  # body cut short, can't reuse
 
             def do_POST(self):
                 path = self.path.split("?", 1)[0]
 
+                # Parse form first: every reply, early ones included, must
+                # follow the whole body or the next keep-alive request desyncs
+                form = self._form()
+
                 # Optional login endpoint: always succeed and set cookie
                 if path == "/login":
-                    _ = self._form()
                     return self._send_json(200, {"ok": True}, {"Set-Cookie": "auth=true; Path=/"})
 
                 # Enforce cookie for the rest
                 if not self._require_cookie():
                     return self._send_json(403, {"ok": False, "error": "unauthorized"})
 
-                # Parse form
-                form = self._form()
-
                 if path == "/channel/create":
                     name = (form.get("name") or "").strip() or peer.channel
                     peer._ensure_channel(name)
@@ -420,10 +701,12 @@ class P2PPeer:
                     name = (form.get("name") or "").strip() or peer.channel
                     pid  = (form.get("peer_id") or "").strip() or peer.peer_id
                     peer._ensure_channel(name)
-                    # Return local knowledge of connected peers
-                    with peer.conns_lock:
-                        peers = {k: {"connected": True} for k in peer.conns.keys()}
-                    return self._send_json(200, {"ok": True, "channel": name, "peer_id": pid, "peers": peers})
+                    # Return local knowledge of connected peers (pre-encoded, see _connected_peers_json)
+                    raw = b"".join((b'{"ok": true, "channel": ', json.dumps(name).encode("utf-8"),
+                                    b', "peer_id": ', json.dumps(pid).encode("utf-8"),
+                                    b', "peers": ', peer._connected_peers_json(), b"}"))
+                    return self._send(200, {"Content-Type": "application/json",
+                                            "Content-Length": str(len(raw))}, raw)
 
                 if path == "/message":
                     name = (form.get("name") or "").strip() or peer.channel
@@ -443,7 +726,15 @@ class P2PPeer:
                         after = int(form.get("after") or "0")
                     except Exception:
                         after = 0
-                    msgs = peer._get_messages_after(name, after)
+                    # long-poll: X-Wait-Ms lets the UI park here until a new message arrives
+                    try:
+                        wait_ms = min(int(self.headers.get("X-Wait-Ms", "0")), SYNC_MAX_WAIT_MS)
+                    except Exception:
+                        wait_ms = 0
+                    if wait_ms > 0:
+                        msgs = peer._wait_messages_after(name, after, wait_ms / 1000.0)
+                    else:
+                        msgs = peer._get_messages_after(name, after)
                     return self._send_json(200, {"messages": msgs})
 
                 # Not found
@@ -490,12 +781,14 @@ class P2PPeer:
             pass
         finally:
             self.stop = True
-            with self.conns_lock:
-                for s in self.conns.values():
-                    try:
-                        s.close()
-                    except Exception:
-                        pass
+            self._stop_ev.set()
+            with self._http_lock:
+                self._close_http()
+            for s in self.conns.values():
+                try:
+                    s.close()
+                except Exception:
+                    pass
             print("\nbye.")
 
 
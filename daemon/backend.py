@@ -23,6 +23,7 @@ Requirements:
 --------------
 - socket: provide socket networking interface.
 - threading: Enables concurrent client handling via threads.
+- concurrent.futures: bounded worker pool serving client connections.
 - response: response utilities.
 - httpadapter: the class for handling HTTP requests.
 - CaseInsensitiveDict: provides dictionary for managing headers or routes.
@@ -30,7 +31,8 @@ Requirements:
 
 Notes:
 ------
-- The server create daemon threads for client handling.
+- Client connections are served by a fixed pool of ``MAX_WORKERS`` threads;
+  when every worker is busy new connections get a 503 reply.
 - The current implementation error handling is minimal, socket errors are printed to the console.
 - The actual request processing is delegated to the HttpAdapter class.
 
@@ -43,11 +45,28 @@ Usage Example:
 import socket
 import threading
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 from .response import *
-from .httpadapter import HttpAdapter
+from .httpadapter import HttpAdapter, reclaim_idle
 from .dictionary import CaseInsensitiveDict
 
+#: Number of worker threads serving client connections.
+MAX_WORKERS = 32
+
+#: Seconds to wait for a worker freed by closing an idle connection.
+RECLAIM_WAIT = 1.0
+
+#: Reply sent to a client when every worker is busy.
+BUSY_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 19\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"Service Unavailable"
+)
+
 def handle_client(ip, port, conn, addr, routes):
     """
     Initializes an HttpAdapter instance and delegates the client handling logic to it.
@@ -66,8 +85,10 @@ def handle_client(ip, port, conn, addr, routes):
 def run_backend(ip, port, routes):
     """
     Starts the backend server, binds to the specified IP and port, and listens for incoming
-    connections. Each connection is handled in a separate thread. The backend accepts incoming
-    connections and spawns a thread for each client.
+    connections. Each connection is handed to a bounded pool of ``MAX_WORKERS`` threads.
+    When every worker is taken, the longest idle keep-alive connection is closed to free
+    one; only when no worker is idle is the new connection answered with 503 and closed
+    instead of queueing without limit.
 
 
     :param ip (str): IP address to bind the server.
@@ -75,6 +96,14 @@ def run_backend(ip, port, routes):
     :param routes (dict): Dictionary of route handlers.
     """
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="backend")
+    slots = threading.BoundedSemaphore(MAX_WORKERS)
+
+    def serve(conn, addr):
+        try:
+            handle_client(ip, port, conn, addr, routes)
+        finally:
+            slots.release()
 
     try:
         server.bind((ip, port))
@@ -85,15 +114,16 @@ def run_backend(ip, port, routes):
 
         while True:
             conn, addr = server.accept()
-            #
-            #  TODO: implement the step of the client incomping connection
-            #        using multi-thread programming with the
-            #        provided handle_client routine
-            #
-            thread = threading.Thread(
-                target=handle_client, args=(ip, port, conn, addr, routes), daemon=True
-            )
-            thread.start()
+            if not slots.acquire(blocking=False) and not (
+                    reclaim_idle() and slots.acquire(timeout=RECLAIM_WAIT)):
+                print("[Backend] All {} workers busy, rejecting {}".format(MAX_WORKERS, addr))
+                try:
+                    conn.sendall(BUSY_RESPONSE)
+                except socket.error:
+                    pass
+                conn.close()
+                continue
+            pool.submit(serve, conn, addr)
     except socket.error as e:
         print("Socket error: {}".format(e))
 
@@ -49,4 +49,15 @@ class CaseInsensitiveDict(MutableMapping):
         return iter(self.store)
 
     def __len__(self):
-        return len(self.store)
\ No newline at end of file
+        return len(self.store)
+
+    # Keys are lowered once on insert, so lookups go straight to the dict
+    # instead of through MutableMapping's __getitem__/KeyError fallbacks.
+    def get(self, key, default=None):
+        return self.store.get(key.lower(), default)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and key.lower() in self.store
+
+    def __repr__(self):
+        return repr(self.store)
@@ -20,11 +20,127 @@ raw URL paths and RESTful route definitions, and integrates with
 Request and Response objects to handle client-server communication.
 """
 
-import json
+import logging
+import queue
+import re
+import socket
+import threading
+from functools import lru_cache
 from .request import Request
 from .response import Response
 from .dictionary import CaseInsensitiveDict
 
+log = logging.getLogger(__name__)
+
+#: Idle timeout (seconds) of a persistent connection.
+KEEP_ALIVE_TIMEOUT = 5
+#: Maximum number of requests served over one connection.
+KEEP_ALIVE_MAX = 100
+
+#: Largest message (bytes) for which the receive buffer is sized up front.
+MAX_PRESIZE = 16 << 20
+
+#: Precomputed replies sent verbatim; both close the connection.
+_RESP_401 = (
+    b"HTTP/1.1 401 Unauthorized\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 38\r\n"
+    b"Connection: close\r\n\r\n"
+    b'{"ok": false, "error": "Unauthorized"}'
+)
+_RESP_500 = (
+    b"HTTP/1.1 500 Internal Server Error\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 21\r\n"
+    b"Connection: close\r\n\r\n"
+    b"Internal Server Error"
+)
+
+#: Free lists of Request/Response objects recycled across connections.
+POOL_SIZE = 64
+_request_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_response_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+
+
+def _acquire(pool, factory):
+    """
+    Takes a recycled object from ``pool``, or builds one with ``factory``.
+    """
+    try:
+        return pool.get_nowait()
+    except queue.Empty:
+        return factory()
+
+
+def _release(pool, obj):
+    """
+    Returns ``obj`` to ``pool``; it is dropped when the pool is full.
+    """
+    try:
+        pool.put_nowait(obj)
+    except queue.Full:
+        pass
+
+
+#: Keep-alive connections waiting for their next request, oldest first,
+#: mapped to True once :func:`reclaim_idle` has shut them down.
+_idle = {}
+_idle_lock = threading.Lock()
+
+
+def reclaim_idle():
+    """
+    Shuts down the longest idle keep-alive connection, so the worker
+    parked on it returns to the pool and can serve new work.
+
+    :rtype bool: True if a connection was shut down.
+    """
+    with _idle_lock:
+        for conn, reclaimed in _idle.items():
+            if not reclaimed:
+                break
+        else:
+            return False
+        _idle[conn] = True
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    return True
+
+
+#: Matches the Content-Length header inside a raw request head.
+_CL_RE = re.compile(rb"\r\ncontent-length:[ \t]*(\d+)", re.I)
+
+#: Matches the Connection header inside a raw request head.
+_CONN_RE = re.compile(rb"\r\nconnection:[ \t]*([^\r]*)", re.I)
+
+#: Splits a Cookie header into (name, value) pairs.
+_COOKIE_RE = re.compile(r"\s*([^=;\s]+)=([^;]*?)\s*(?:;|$)")
+#: Matches the auth cookie as a whole cookie pair.
+_AUTH_RE = re.compile(r"(?:^|;)\s*auth=true\s*(?:;|$)")
+
+#: File extensions served without authentication.
+_PUBLIC_EXTS = frozenset(("html", "css", "js", "png", "jpg", "ico"))
+
+
+@lru_cache(maxsize=1024)
+def _is_public(method, path):
+    """
+    Tells whether a request may be served without the auth cookie.
+
+    :param method (str): upper-cased HTTP method.
+    :param path (str): request path.
+
+    :rtype bool: True for the login endpoint, the index and static assets.
+    """
+    _, dot, ext = path.rpartition(".")
+    return (
+        path == "/"
+        or (dot and ext in _PUBLIC_EXTS)
+        or (method, path) == ("POST", "/login")
+    )
+
 class HttpAdapter:
     """
     A mutable :class:`HTTP adapter <HTTP adapter>` for managing client connections
@@ -76,33 +192,151 @@ class HttpAdapter:
         self.connaddr = connaddr
         #: Routes
         self.routes = routes
-        #: Request
-        self.request = Request()
-        #: Response
-        self.response = Response()
+        #: Request (built per request by handle_client)
+        self.request = None
+        #: Response (built per request by handle_client)
+        self.response = None
+        #: Bytes received past the end of the previous request
+        self._pending = b""
         
-    def _recv_full_http(self, conn):
-        data = b""
-        conn.settimeout(2.0)
+    def _recv_full_http(self, conn, reclaimable=False):
+        """
+        Read one full HTTP request (head + body) from the socket.
+
+        Data is received with ``recv_into`` directly into one preallocated
+        buffer. Only the newly received tail is scanned for the header
+        terminator; once the head is complete, Content-Length is parsed a
+        single time and the buffer is sized for the whole message, so the
+        remaining reads only wait for the body (up to ``MAX_PRESIZE``).
+        Otherwise the buffer doubles whenever it fills up.
+        Bytes following the request (pipelined requests on a persistent
+        connection) are kept for the next call. If ``reclaimable``, the
+        connection is listed as idle while no byte of the request has
+        arrived, and may be shut down by :func:`reclaim_idle`; a request
+        read after that is dropped.
+
+        :param conn (socket): The client socket connection.
+        :param reclaimable (bool): True between keep-alive requests.
+
+        :rtype bytes: raw HTTP request, empty if the peer closed (also in the
+                      middle of a body) or the connection stayed idle past
+                      the keep-alive timeout.
+        """
+        pending = self._pending
+        self._pending = b""
+        buf = bytearray(max(65536, len(pending)))
+        buf[:len(pending)] = pending
+        mv = memoryview(buf)
+        used = len(pending)
+        scanned = 0
+        header_end = -1
+        cl = 0
+        conn.settimeout(KEEP_ALIVE_TIMEOUT)
         while True:
-            chunk = conn.recv(4096)
-            if not chunk:
+            if header_end < 0:
+                header_end = buf.find(b"\r\n\r\n", max(0, scanned - 3), used)
+                scanned = used
+                if header_end >= 0:
+                    m = _CL_RE.search(buf, 0, header_end)
+                    cl = int(m.group(1)) if m else 0
+                    total = header_end + 4 + cl
+                    if len(buf) < total <= MAX_PRESIZE:
+                        mv.release()
+                        buf.extend(bytes(total - len(buf)))
+                        mv = memoryview(buf)
+            if header_end >= 0 and used - (header_end + 4) >= cl:
                 break
-            data += chunk
-            if b"\r\n\r\n" in data:
-                head, body = data.split(b"\r\n\r\n", 1)
-                headers = head.decode(errors="ignore").split("\r\n")
-                cl = None
-                for line in headers:
-                    if line.lower().startswith("content-length:"):
-                        try:
-                            cl = int(line.split(":", 1)[1].strip())
-                        except:
-                            cl = None
-                        break
-                if cl is None or len(body) >= cl:
-                    break
-        return data.decode(errors="ignore")
+            if used == len(buf):
+                mv.release()
+                buf.extend(bytes(len(buf)))
+                mv = memoryview(buf)
+            idle = reclaimable and not used
+            if idle:
+                with _idle_lock:
+                    _idle[conn] = False
+            try:
+                n = conn.recv_into(mv[used:])
+            except socket.timeout:
+                if used:
+                    raise
+                n = 0
+            finally:
+                if idle:
+                    with _idle_lock:
+                        if _idle.pop(conn, False):
+                            n = 0
+            if not n:
+                break
+            used += n
+
+        if header_end < 0:
+            end = used
+        elif used - (header_end + 4) < cl:
+            # peer closed before the whole body arrived; drop the request
+            return b""
+        else:
+            end = header_end + 4 + cl
+        self._pending = mv[end:used].tobytes()
+        return mv[:end].tobytes()
+
+
+    def _send(self, conn, header, body):
+        """
+        Send a response header and body, with one gather write when the
+        socket supports ``sendmsg``.
+
+        :param conn (socket): The client socket connection.
+        :param header (bytes): encoded response header.
+        :param body (bytes): response body.
+        """
+        if not body:
+            conn.sendall(header)
+            return
+        if not hasattr(conn, "sendmsg"):
+            conn.sendall(header + body)
+            return
+        bufs = [memoryview(header), memoryview(body)]
+        while bufs:
+            sent = conn.sendmsg(bufs)
+            while sent:
+                if sent >= len(bufs[0]):
+                    sent -= len(bufs.pop(0))
+                else:
+                    bufs[0] = bufs[0][sent:]
+                    sent = 0
+
+
+    def _prepare_static(self, req, raw, routes):
+        """
+        Fast path for public static assets.
+
+        A GET for a public path with no registered route only needs the
+        request line (and the Connection header for keep-alive), so the
+        full :meth:`Request.prepare` parse of headers, cookies and routes
+        is skipped.
+
+        :param req (Request): request object to fill in.
+        :param raw (bytes): raw HTTP request.
+        :param routes (dict): The route mapping for dispatching requests.
+
+        :rtype bool: True if ``req`` was prepared by the fast path.
+        """
+        line_end = raw.find(b"\r\n")
+        if line_end < 0:
+            return False
+        parts = raw[:line_end].decode("latin-1").split(" ")
+        if len(parts) != 3 or parts[0] != "GET":
+            return False
+        method, path, version = parts
+        if not _is_public(method, path) or (routes and (method, path) in routes):
+            return False
+
+        req.method, req.path, req.version = method, path, version
+        head_end = raw.find(b"\r\n\r\n")
+        m = _CONN_RE.search(raw, 0, head_end if head_end >= 0 else len(raw))
+        if m:
+            req.headers = CaseInsensitiveDict(connection=m.group(1).decode("latin-1"))
+        return True
 
 
     def handle_client(self, conn, addr, routes):
@@ -111,7 +345,9 @@ class HttpAdapter:
 
         This method reads the request from the socket, prepares the request object,
         invokes the appropriate route handler if available, builds the response,
-        and sends it back to the client.
+        and sends it back to the client. HTTP/1.1 connections are kept alive
+        and serve further requests until the client asks to close, stays idle
+        for ``KEEP_ALIVE_TIMEOUT`` seconds or reaches ``KEEP_ALIVE_MAX`` requests.
 
         :param conn (socket): The client socket connection.
         :param addr (tuple): The client's address.
@@ -121,68 +357,84 @@ class HttpAdapter:
 
         self.connaddr = addr
 
-        req = self.request
-
-        resp = self.response
+        req = self.request = _acquire(_request_pool, Request)
+        resp = self.response = _acquire(_response_pool, Response)
 
         try:
-            raw = self._recv_full_http(conn)
-            print(f"[HttpAdapter] Received request from {addr}")
-
-            req.prepare(raw, routes)
-            path = req.path or "/"
-            method = (req.method or "GET").upper()
-            is_public = (
-                (method, path) == ("POST", "/login")
-                or path.endswith((".html", ".css", ".js", ".png", ".jpg", ".ico"))
-                or path == "/"  
-            )
-
-            if not is_public:
-                ck = (req.headers or {}).get("cookie", "")
-                if "auth=true" not in ck:
-                    resp.status_code = 401
-                    resp.headers["Content-Type"] = "application/json"
-                    resp.body = json.dumps({"ok": False, "error": "Unauthorized"})
-                    conn.sendall(resp.build_response(req))
-                    conn.close()
-                    return
-            print(f"[HttpAdapter] Method: {getattr(req,'method','UNKNOWN')}, Path: {getattr(req,'path','UNKNOWN')}")
-
-            if req.hook:
-                print(f"[HttpAdapter] Hook found - METHOD {getattr(req.hook,'_route_methods',None)} PATH {getattr(req.hook,'_route_path',None)}")
-                try:
-                    result = req.hook(headers=req.headers, body=req.body or "")
-                    if isinstance(result, (dict, list)):
-                        req.hook_response = result
-                    elif isinstance(result, (str, bytes)):
-                        req.hook_response = {
-                            "message": result if isinstance(result, str)
-                            else result.decode("utf-8", "ignore")
-                        }
-                    else:
-                        req.hook_response = {"ok": True}
-                except Exception as e:
-                    import traceback; traceback.print_exc()
-                    req.hook_response = {"error": str(e)}
-            else:
-                print("[HttpAdapter] No hook found for this request")
+            for served in range(1, KEEP_ALIVE_MAX + 1):
+                raw = self._recv_full_http(conn, served > 1)
+                if not raw:
+                    break
+                print(f"[HttpAdapter] Received request from {addr}")
+
+                req.reset()
+                resp.reset()
+
+                if not self._prepare_static(req, raw, routes):
+                    req.prepare(raw, routes)
+                path = req.path or "/"
+                method = (req.method or "GET").upper()
 
-            # Build and send response
-            response_bytes = resp.build_response(req)
-            conn.sendall(response_bytes)
+                if req.method and served < KEEP_ALIVE_MAX:
+                    ck = (req.headers or {}).get("connection", "").lower()
+                    if req.version == "HTTP/1.1":
+                        resp.keep_alive = "close" not in ck
+                    else:
+                        resp.keep_alive = "keep-alive" in ck
+                if resp.keep_alive:
+                    resp.headers["Keep-Alive"] = "timeout={}, max={}".format(
+                        KEEP_ALIVE_TIMEOUT, KEEP_ALIVE_MAX - served)
+
+                if not _is_public(method, path):
+                    if not _AUTH_RE.search((req.headers or {}).get("cookie", "")):
+                        conn.sendall(_RESP_401)
+                        break
+                print(f"[HttpAdapter] Method: {getattr(req,'method','UNKNOWN')}, Path: {getattr(req,'path','UNKNOWN')}")
+
+                if req.hook:
+                    print(f"[HttpAdapter] Hook found - METHOD {getattr(req.hook,'_route_methods',None)} PATH {getattr(req.hook,'_route_path',None)}")
+                    try:
+                        result = req.hook(req.headers, req.body or "")
+                        if isinstance(result, (dict, list)):
+                            req.hook_response = result
+                        elif isinstance(result, (str, bytes)):
+                            req.hook_response = {
+                                "message": result if isinstance(result, str)
+                                else result.decode("utf-8", "ignore")
+                            }
+                        else:
+                            req.hook_response = {"ok": True}
+                    except Exception as e:
+                        log.exception("[HttpAdapter] Route handler failed for %s %s", req.method, req.path)
+                        req.hook_response = {"error": str(e)}
+                else:
+                    print("[HttpAdapter] No hook found for this request")
+
+                # Build and send response
+                header, content = resp.build_response(req)
+                self._send(conn, header, content)
+                if resp.stream is not None:
+                    try:
+                        conn.sendfile(resp.stream)
+                    finally:
+                        resp.close()
+
+                if not resp.keep_alive:
+                    break
 
         except Exception:
-            import traceback; traceback.print_exc()
+            log.exception("[HttpAdapter] Error handling client %s", addr)
+            resp.close()
             try:
-                conn.sendall(
-                    b"HTTP/1.1 500 Internal Server Error\r\n"
-                    b"Content-Type: text/plain\r\n\r\n"
-                    b"Internal Server Error"
-                )
+                conn.sendall(_RESP_500)
             except:
                 pass
         finally:
+            self.request = self.response = None
+            req.reset()
+            resp.reset()
+            _release(_request_pool, req)
+            _release(_response_pool, resp)
             try:
                 conn.close()
             except:
@@ -196,19 +448,13 @@ class HttpAdapter:
         :param resp: (Response) The res:class:`Response <Response>` object.
         :rtype: cookies - A dictionary of cookie key-value pairs.
         """
-        cookies = {}
         headers = getattr(req, "headers", {}) or {}
         cookie_str = headers.get("cookie")
         
         if not cookie_str:
-            return cookies
+            return {}
         
-        for pair in cookie_str.split(";"):
-            pair = pair.strip()
-            if "=" in pair:
-                key, value = pair.split("=", 1)
-                cookies[key] = value
-        return cookies
+        return dict(_COOKIE_RE.findall(cookie_str))
 
     def build_response(self, req, resp):
         """Builds a :class:`Response <Response>` object 
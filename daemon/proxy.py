@@ -42,6 +42,28 @@ PROXY_PASS = {
 }
 
 
+#: Hop-by-hop headers dropped from a forwarded request; the proxy sets its own.
+_HOP_HEADERS = ("connection:", "keep-alive:", "proxy-connection:")
+
+
+def _with_connection_close(request):
+    """
+    Rewrites the request head to ask the backend to close after replying.
+
+    The backend keeps HTTP/1.1 connections alive, and :func:`forward_request`
+    reads the response until EOF, so without this every proxied request
+    would wait for the backend's keep-alive timeout.
+
+    :params request (str): incoming HTTP request.
+
+    :rtype str: the same request with ``Connection: close``.
+    """
+    head, sep, body = request.partition("\r\n\r\n")
+    lines = [l for l in head.split("\r\n") if not l.lower().startswith(_HOP_HEADERS)]
+    lines.append("Connection: close")
+    return "\r\n".join(lines) + "\r\n\r\n" + body
+
+
 def forward_request(host, port, request):
     """
     Forwards an HTTP request to a backend server and retrieves the response.
@@ -58,7 +80,7 @@ def forward_request(host, port, request):
 
     try:
         backend.connect((host, port))
-        backend.sendall(request.encode())
+        backend.sendall(_with_connection_close(request).encode())
         response = b""
         while True:
             chunk = backend.recv(4096)
@@ -76,6 +98,8 @@ def forward_request(host, port, request):
             "\r\n"
             "404 Not Found"
         ).encode('utf-8')
+    finally:
+        backend.close()
 
 
 def resolve_routing_policy(hostname, routes):
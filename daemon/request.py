@@ -20,6 +20,13 @@ request settings (cookies, auth, proxies).
 from .dictionary import CaseInsensitiveDict
 from urllib.parse import urlencode, parse_qs
 import json 
+import re
+
+#: Request line: method, target without whitespace, and an HTTP/x.y version.
+_REQUEST_LINE_RE = re.compile(r"([A-Za-z]+) (\S+) (HTTP/\d\.\d)")
+
+#: Methods whose body is decoded; any other method skips body handling.
+_BODY_METHODS = frozenset(("POST", "PUT", "PATCH"))
 
 
 class Request():
@@ -54,12 +61,16 @@ class Request():
 
 
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clears all per-request state so the object can be reused."""
         #: HTTP verb (GET/POST/...)
         self.method = None
         #: Original URL if any (not required for inbound)
         self.url = None
-        #: Headers dictionary (lowercased keys)
-        self.headers = {}
+        #: Headers dictionary (case-insensitive keys)
+        self.headers = CaseInsensitiveDict()
         #: Request path
         self.path = None
         #: HTTP version
@@ -72,45 +83,62 @@ class Request():
         self.routes = {}
         #: Matched route handler (callable) or None
         self.hook = None
+        #: Result returned by the hook, serialized as JSON
+        self.hook_response = None
 
     def extract_request_line(self, request):
-        try:
-            lines = request.splitlines()
-            if not lines:
-                return None, None, None
+        # find() stops at the first CRLF; partition() would also copy the rest
+        nl = request.find('\r\n')
+        return self.parse_request_line(request[:nl] if nl >= 0 else request)
 
-            first_line = lines[0]
-            parts = first_line.split()
+    def parse_request_line(self, line):
+        """
+        Parses an HTTP request line into its three parts.
 
-            if len(parts) != 3:
-                return None, None, None
+        :param line (str): the first line of the request, without CRLF.
 
-            method, path, version = parts
-            return method.upper(), path, version
-        
-        except Exception as e:
-            print(f"[Request] Error parsing request line: {e}")
+        :rtype tuple: (method, path, version), or three Nones if malformed.
+        """
+        m = _REQUEST_LINE_RE.fullmatch(line)
+        if m is None:
             return None, None, None
-             
+        method, path, version = m.groups()
+        return method.upper(), path, version
+
     def prepare_headers(self, request):
         """
         Prepares the given HTTP headers.
         """
-        lines = request.split('\r\n')
-        headers = {}
-        for line in lines[1:]:
-            if ': ' in line:
-                key, val = line.split(': ', 1)
-                headers[key.lower()] = val
+        return self.parse_header_lines(request.split('\r\n')[1:])
+
+    def parse_header_lines(self, lines):
+        """
+        Builds the headers dict (lowercased keys) from already split lines.
+
+        :param lines (list): header lines, request line excluded.
+
+        :rtype CaseInsensitiveDict: parsed headers.
+        """
+        headers = CaseInsensitiveDict()
+        # fill the backing store directly: one lower() per header line
+        store = headers.store
+        for line in lines:
+            key, sep, val = line.partition(': ')
+            if sep:
+                store[key.lower()] = val
         return headers
     
     
-    def prepare_body(self, request):
+    def prepare_body(self, body):
+        """
+        Decodes the raw message body.
+
+        :param body (bytes): body bytes (or a memoryview over them).
+
+        :rtype str: decoded body.
+        """
         try:
-            parts = request.split('\r\n\r\n', 1)
-            if len(parts) == 2:
-                return parts[1]
-            return ""
+            return str(body, "utf-8", errors="ignore")
         except Exception as e:
             print(f"[Request] Error extracting body: {e}")
             return ""
@@ -121,18 +149,28 @@ class Request():
         if not cookie_string:
             return cookies
         for pair in cookie_string.split(";"):
-            pair = pair.strip()
-            if "=" in pair:
-                k, v = pair.split("=", 1)
+            k, sep, v = pair.partition("=")
+            if sep:
                 cookies[k.strip()] = v.strip()
         return cookies
     
     
     def prepare(self, request, routes=None):
-        """Prepares the entire request with the given parameters."""
+        """Prepares the entire request with the given parameters.
+
+        The raw message is kept as bytes: only the head is decoded
+        (latin-1, as mandated for HTTP header fields), while the body is
+        sliced without copying and decoded only for methods carrying one.
+        """
+        if isinstance(request, str):
+            request = request.encode("utf-8")
+        head_end = request.find(b"\r\n\r\n")
+        head = request if head_end < 0 else request[:head_end]
+        # Split the head once; request line and headers reuse the same list
+        lines = head.decode("latin-1").split('\r\n')
 
         # Prepare the request line from the request header
-        self.method, self.path, self.version = self.extract_request_line(request)
+        self.method, self.path, self.version = self.parse_request_line(lines[0])
         if not self.method or not self.path:
             print("[Request] Failed to parse request line")
             return
@@ -147,17 +185,18 @@ class Request():
         #
         
         # Headers
-        self.headers = self.prepare_headers(request)
+        self.headers = self.parse_header_lines(lines[1:])
 
-        # Body + form
-        if self.method in ("POST", "PUT", "PATCH"):
-            self.body = self.prepare_body(request)
+        # Body + form: only body methods pay for the slice and the decode
+        if self.method in _BODY_METHODS:
+            body = b"" if head_end < 0 else memoryview(request)[head_end + 4:]
+            self.body = self.prepare_body(body)
             print(f"[Request] Body extracted ({len(self.body)} bytes): {self.body[:100]}")
         else:
             self.body = ""
     
-        # Cookies
-        cookie_header = self.headers.get("cookie", "")
+        # Cookies: parsed only when the header is present
+        cookie_header = self.headers.store.get("cookie")
         if cookie_header:
             print(f"[Request] Cookies found: {cookie_header}")
             self.cookies = self.parse_cookies(cookie_header)
@@ -188,7 +227,7 @@ class Request():
         #
         # TODO prepare the request authentication
         #
-	# self.auth = ...
+        # self.auth = ...
         try:
             if callable(auth):
                 r = auth(self)
@@ -22,12 +22,166 @@ The current version supports MIME type detection, content loading and header for
 """
 import datetime
 import os
+import time
 import mimetypes
+from email.utils import formatdate
+from functools import lru_cache
 from .dictionary import CaseInsensitiveDict
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 BASE_DIR = ""
 
+#: Absolute content directories, resolved once at import time.
+WWW_DIR = os.path.realpath(os.path.join(BASE_DIR, "www"))
+STATIC_DIR = os.path.realpath(os.path.join(BASE_DIR, "static"))
+APPS_DIR = os.path.realpath(os.path.join(BASE_DIR, "apps"))
+
+def _jdumps(obj):
+    """
+    Serializes a JSON response body straight to bytes, using orjson when
+    it is installed and the standard :mod:`json` module otherwise.
+
+    :params obj (dict|list): JSON-serializable object.
+
+    :rtype bytes: UTF-8 encoded JSON.
+    """
+    return json.dumps(obj).encode("utf-8")
+
+
+if orjson is not None:
+    def _jdumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+#: Upper bound on the number of static files kept in memory.
+STATIC_CACHE_SIZE = 256
+#: Files larger than this (in bytes) are streamed with sendfile, not cached.
+STATIC_CACHE_MAX_FILE = 1 << 20
+
+
+@lru_cache(maxsize=STATIC_CACHE_SIZE)
+def _load_static(filepath, mtime_ns):
+    """
+    Reads a static file and memoizes its content.
+
+    The modification time is part of the cache key, so an edited file
+    is transparently re-read on the next request.
+
+    :params filepath (str): path to the file.
+    :params mtime_ns (int): file modification time in nanoseconds.
+
+    :rtype bytes: file content.
+    """
+    with open(filepath, "rb") as f:
+        return f.read()
+
+
+def _build_ext_table():
+    """
+    Precomputes the file extension dispatch used by the file-based branch
+    of :meth:`Response.build_response`.
+
+    Each known extension is mapped once to its MIME type and the base
+    directory the file is served from (``www`` for html, ``static`` for
+    css and images, ``apps`` for application types). Known extensions
+    that are not served map to None.
+
+    :rtype dict: mapping of extension (e.g. '.html') to (mime_type, base_dir).
+    """
+    mimetypes.init()
+    table = {}
+    for ext, mime_type in mimetypes.types_map.items():
+        main_type = mime_type.split("/", 1)[0]
+        if mime_type == "text/html":
+            base_dir = WWW_DIR
+        elif mime_type == "text/css" or main_type == "image":
+            base_dir = STATIC_DIR
+        elif main_type == "application":
+            base_dir = APPS_DIR
+        else:
+            table[ext] = None
+            continue
+        table[ext] = (mime_type, base_dir)
+    return table
+
+
+#: Extension -> (mime_type, base_dir) for servable static files.
+_EXT_TABLE = _build_ext_table()
+#: Dispatch for extensions unknown to :mod:`mimetypes`.
+_EXT_DEFAULT = ("application/octet-stream", APPS_DIR)
+
+#: Reason phrases of the status codes emitted by the server.
+_REASONS = {
+    200: b"OK", 201: b"Created", 204: b"No Content",
+    301: b"Moved Permanently", 302: b"Found", 304: b"Not Modified",
+    400: b"Bad Request", 401: b"Unauthorized", 403: b"Forbidden",
+    404: b"Not Found", 500: b"Internal Server Error",
+    502: b"Bad Gateway", 503: b"Service Unavailable",
+}
+
+#: Response header template: status code, reason, date, content type,
+#: content length, connection and any extra pre-encoded header lines.
+_HDR_TMPL = (
+    b"HTTP/1.1 %d %b\r\n"
+    b"Date: %b\r\n"
+    b"Server: WeApRous/1.0\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Pragma: no-cache\r\n"
+    b"Content-Type: %b\r\n"
+    b"Content-Length: %d\r\n"
+    b"Connection: %b\r\n"
+    b"%b\r\n"
+)
+
+#: Last formatted Date header value as [epoch_second, bytes].
+_date_cache = [0, b""]
+
+
+def _http_date():
+    """
+    Returns the current RFC 1123 date, formatted at most once per second.
+
+    :rtype bytes: value of the Date header.
+    """
+    now = int(time.time())
+    if now != _date_cache[0]:
+        _date_cache[1] = formatdate(now, usegmt=True).encode("ascii")
+        _date_cache[0] = now
+    return _date_cache[1]
+
+
+#: Fully precomputed (header, body) error responses; they close the connection.
+_RESP_404 = (
+    b"HTTP/1.1 404 Not Found\r\n"
+    b"Accept-Ranges: bytes\r\n"
+    b"Content-Type: text/html\r\n"
+    b"Content-Length: 13\r\n"
+    b"Cache-Control: max-age=86000\r\n"
+    b"Connection: close\r\n\r\n",
+    b"404 Not Found",
+)
+_RESP_403 = (
+    b"HTTP/1.1 403 Forbidden\r\n"
+    b"Content-Type: text/html\r\n"
+    b"Content-Length: 13\r\n"
+    b"Connection: close\r\n\r\n",
+    b"403 Forbidden",
+)
+
+#: Shared zero duration for :attr:`Response.elapsed` (timedelta is immutable).
+_NO_ELAPSED = datetime.timedelta(0)
+
+#: Header names always emitted by :meth:`Response.build_response_header`.
+_BASE_HEADERS = frozenset((
+    "Date", "Server", "Cache-Control", "Pragma",
+    "Content-Type", "Content-Length", "Connection",
+))
+
 class Response():   
     """The :class:`Response <Response>` object, which contains a
     server's response to an HTTP request.
@@ -49,6 +203,8 @@ class Response():
     :attrs cookies (CaseInsensitiveDict): response cookies.
     :attrs elapsed (datetime.timedelta): time taken to complete the request.
     :attrs request (PreparedRequest): the original request object.
+    :attrs stream (file): opened file to send after the header, or None.
+    :attrs keep_alive (bool): keep the connection open after this response.
 
     Usage::
 
@@ -73,10 +229,29 @@ class Response():
         "elapsed",
         "request",
         "body",
+        "stream",
+        "keep_alive",
     ]
 
 
     def __init__(self, request=None):
+        self.stream = None
+        self.reset()
+
+
+    def close(self):
+        """
+        Closes the file opened for :attr:`stream`, if any, and clears it.
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def reset(self):
+        """
+        Clears all per-response state so the object can be reused.
+        """
+        self.close()
         self._content = b""
         self._content_consumed = False
         self._next = None
@@ -87,9 +262,11 @@ class Response():
         self.history = []
         self.reason = None
         self.cookies = {}
-        self.elapsed = datetime.timedelta(0)
+        self.elapsed = _NO_ELAPSED
         self.request = None
         self.body = None  
+        self.stream = None
+        self.keep_alive = False
 
 
     def get_mime_type(self, path):
@@ -129,19 +306,19 @@ class Response():
         if main_type == "text":
             self.headers["Content-Type"] = f"text/{sub_type}"
             if sub_type in ("plain", "css"):
-                base_dir = os.path.join(BASE_DIR, "static")
+                base_dir = STATIC_DIR
             elif sub_type == "html":
-                base_dir = os.path.join(BASE_DIR, "www")
+                base_dir = WWW_DIR
             else:
                 raise ValueError(f"Invalid text MIME sub_type: {sub_type}")
             
         elif main_type == "image":
             self.headers["Content-Type"] = f"image/{sub_type}"
-            base_dir = os.path.join(BASE_DIR, "static")
+            base_dir = STATIC_DIR
             
         elif main_type == "application":
             self.headers["Content-Type"] = f"application/{sub_type}"
-            base_dir = os.path.join(BASE_DIR, "apps")
+            base_dir = APPS_DIR
             
         else:
             raise ValueError(f"Invalid MIME type: main_type={main_type} sub_type={sub_type}")
@@ -154,20 +331,25 @@ class Response():
         Loads the objects file from storage space.
 
         :params path (str): relative path to the file.
-        :params base_dir (str): base directory where the file is located.
+        :params base_dir (str): absolute directory where the file is located.
+
+        Files above ``STATIC_CACHE_MAX_FILE`` are not read: they are opened
+        into :attr:`stream` and the returned content is empty.
 
         :rtype tuple: (int, bytes) representing content length and content data.
         """
 
-        filepath = os.path.join(base_dir, path.lstrip('/'))
+        filepath = base_dir + "/" + path.lstrip('/')
         print("[Response] serving the object at location {}".format(filepath))
-            #
-            #  TODO: implement the step of fetch the object file
-            #        store in the return value of content
-            #
+        if not os.path.normpath(filepath).startswith(base_dir + os.sep):
+            print(f"[Response] Path escapes {base_dir}: {path}")
+            return 403, b"403 Forbidden"
         try:
-            with open(filepath, "rb") as f:
-                content = f.read()
+            st = os.stat(filepath)
+            if st.st_size > STATIC_CACHE_MAX_FILE:
+                self.stream = open(filepath, "rb")
+                return st.st_size, b""
+            content = _load_static(filepath, st.st_mtime_ns)
         except FileNotFoundError:
             return 404, b"404 Not Found"
         except PermissionError:
@@ -187,57 +369,38 @@ class Response():
         :rtypes bytes: encoded HTTP response header.
         """
         status_code = self.status_code or 200
-        reasons = {
-            200: "OK", 201: "Created", 204: "No Content",
-            301: "Moved Permanently", 302: "Found", 304: "Not Modified",
-            400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
-            404: "Not Found", 500: "Internal Server Error",
-            502: "Bad Gateway", 503: "Service Unavailable",
-        }
-        reason = reasons.get(status_code, "OK")
 
         if isinstance(self._content, str):
             self._content = self._content.encode("utf-8")
 
-        headers = {
-            "Date": datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT"),
-            "Server": "WeApRous/1.0",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-            "Content-Type": self.headers.get("Content-Type", "text/html; charset=utf-8"),
-            "Content-Length": str(len(self._content)),
-            "Connection": "close",
-        }
-
-        for k, v in self.headers.items():
-            headers.setdefault(k, v)
-
-        lines = [f"HTTP/1.1 {status_code} {reason}"]
-        
-        for k, v in headers.items():
-            lines.append(f"{k}: {v}")
-            
-        header_text = "\r\n".join(lines) + "\r\n\r\n"
-        
-        return header_text.encode("utf-8")
+        if self.stream is not None:
+            content_length = os.fstat(self.stream.fileno()).st_size
+        else:
+            content_length = len(self._content)
+
+        extra = b"".join(
+            b"%b: %b\r\n" % (k.encode("utf-8"), str(v).encode("utf-8"))
+            for k, v in self.headers.items() if k not in _BASE_HEADERS
+        )
+        return _HDR_TMPL % (
+            status_code,
+            _REASONS.get(status_code, b"OK"),
+            _http_date(),
+            self.headers.get("Content-Type", "text/html; charset=utf-8").encode("utf-8"),
+            content_length,
+            b"keep-alive" if self.keep_alive else b"close",
+            extra,
+        )
 
 
     def build_notfound(self):
         """
         Constructs a standard 404 Not Found HTTP response.
 
-        :rtype bytes: Encoded 404 response.
+        :rtype tuple: (bytes, bytes) encoded 404 response header and body.
         """
-        body = b"404 Not Found"
-        hdr = (
-            "HTTP/1.1 404 Not Found\r\n"
-            "Accept-Ranges: bytes\r\n"
-            "Content-Type: text/html\r\n"
-            f"Content-Length: {len(body)}\r\n"
-            "Cache-Control: max-age=86000\r\n"
-            "Connection: close\r\n\r\n"
-        ).encode("utf-8")
-        return hdr + body
+        self.keep_alive = False
+        return _RESP_404
 
 
     def build_response(self, request):
@@ -246,7 +409,8 @@ class Response():
 
         :params request (class:`Request <Request>`): incoming request object.
 
-        :rtype bytes: complete HTTP response using prepared headers and content.
+        :rtype tuple: (bytes, bytes) response header and content, kept apart
+                      so they can be sent with a single gather write.
         """
         # 1) Dynamic body from route handler
         if self.body is not None:
@@ -255,18 +419,18 @@ class Response():
             if self.status_code is None:
                 self.status_code = 200
             self._header = self.build_response_header(request)
-            return self._header + self._content
+            return self._header, self._content
 
         # 2) JSON response from hook_response
         if getattr(request, "hook_response", None) is not None:
             print("[Response] Building JSON response from hook_response")
-            data = json.dumps(request.hook_response).encode("utf-8")
+            data = _jdumps(request.hook_response)
             self.headers["Content-Type"] = "application/json"
             self._content = data
             if self.status_code is None:
                 self.status_code = 200
             self._header = self.build_response_header(request)
-            return self._header + self._content
+            return self._header, self._content
 
         # 3) File-based
         path = request.path or "/"
@@ -274,39 +438,25 @@ class Response():
             path = "/index.html"  
 
         print(f"[Response] Building file-based response for path: {path}")
-        mime_type = self.get_mime_type(path)
-        print(f"[Response] {request.method} path {path} mime_type {mime_type}")
-
-        try:
-            if path.endswith(".html") or mime_type == "text/html":
-                base_dir = self.prepare_content_type("text/html")
-            elif mime_type == "text/css":
-                base_dir = self.prepare_content_type("text/css")
-            elif mime_type.startswith("image/") or mime_type.startswith("application/"):
-                base_dir = self.prepare_content_type(mime_type)
-            else:
-                return self.build_notfound()
-            
-        except (ValueError, PermissionError) as e:
-            print(f"[Response] Error preparing content type: {e}")
+        ext = path.rpartition(".")[2].lower()
+        entry = _EXT_TABLE.get("." + ext, _EXT_DEFAULT)
+        if entry is None:
             return self.build_notfound()
 
+        mime_type, base_dir = entry
+        self.headers["Content-Type"] = mime_type
+        print(f"[Response] {request.method} path {path} mime_type {mime_type}")
+
         c_len, self._content = self.build_content(path, base_dir)
         
         if c_len == 404:
             return self.build_notfound()
         
         if c_len == 403:
-            body = b"403 Forbidden"
-            hdr = (
-                "HTTP/1.1 403 Forbidden\r\n"
-                "Content-Type: text/html\r\n"
-                f"Content-Length: {len(body)}\r\n"
-                "Connection: close\r\n\r\n"
-            ).encode("utf-8")
-            return hdr + body
+            self.keep_alive = False
+            return _RESP_403
 
         self.status_code = 200
         self.reason = "OK"
         self._header = self.build_response_header(request)
-        return self._header + self._content
\ No newline at end of file
+        return self._header, self._content
\ No newline at end of file
@@ -67,6 +67,8 @@ class WeApRous:
         """
         Decorator to register a route handler for a specific path and HTTP methods.
 
+        Handlers are called positionally as ``handler(headers, body)``.
+
         :param path (str): The URL path to route.
         :param methods (list): A list of HTTP methods (e.g., ['GET', 'POST']) to bind.
 
@@ -83,6 +85,24 @@ class WeApRous:
             return func
         return decorator
 
+    def alias(self, path, target):
+        """
+        Register ``path`` as another URL for the handler already routed at ``target``.
+
+        The alias maps straight to the target's handler for each method it is
+        bound to, so dispatch goes there directly without a wrapper function.
+
+        :param path (str): The alias URL path.
+        :param target (str): The URL path of an already registered route.
+
+        :raise: KeyError if no route is registered at ``target``.
+        """
+        bound = [(method, func) for (method, p), func in self.routes.items() if p == target]
+        if not bound:
+            raise KeyError(target)
+        for method, func in bound:
+            self.routes[(method, path)] = func
+
     def run(self):
         """
         Start the backend server and begin handling requests.
@@ -1,17 +1,58 @@
 import socket
+import selectors
 import threading
 import argparse
 import sys
 import time
 import json
 import http.client
+from collections import deque
+from functools import lru_cache
 from urllib.parse import urlencode, urlparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 LINE_SEP = b"\n"
+# Size of the per-connection receive buffer
+RECV_SIZE = 65536
+# Seconds the server may hold a /channel/watch long-poll open
+WATCH_TIMEOUT = 25
+# Kernel send/receive buffer size requested for peer sockets
+SOCK_BUF = 256 * 1024
 
 def now():
     return time.time()
 
+# JSON helpers working on bytes: orjson when installed, stdlib json otherwise
+if orjson is not None:
+    jdumps = orjson.dumps
+    jloads = orjson.loads
+else:
+    def jdumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
+    def jloads(data):
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+# JSON-escaped message text; chats repeat short lines ("ok", "ack") a lot
+jtext = lru_cache(maxsize=256)(jdumps)
+
+def tune_socket(s):
+    """Peer socket options: keepalive, no Nagle delay for small chat lines, bigger buffers."""
+    for level, opt, val in ((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                            (socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF),
+                            (socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF)):
+        try:
+            s.setsockopt(level, opt, val)
+        except OSError:
+            pass
+
 class P2PPeer:
     def __init__(self, server_base, peer_id, channel, listen_ip, listen_port, cookie="auth=true"):
         # Server info (for discovery / join)
@@ -28,18 +69,57 @@ class P2PPeer:
         self.listen_port = int(listen_port)
         self.cookie = cookie
 
-        # Active P2P connections: {peer_id -> socket}
+        # Wire envelopes: only ts/text change per message, so the rest is encoded once
+        self._hello = jdumps({"type": "hello", "from": self.peer_id, "chan": self.channel}) + LINE_SEP
+        self._msg_prefix = (b'{"type":"msg","chan":' + jdumps(self.channel)
+                            + b',"from":' + jdumps(self.peer_id) + b',"ts":')
+
+        # Active P2P connections: {peer_id -> socket}. Copy-on-write: writers
+        # build a new dict under conns_lock and swap it in, readers just read.
         self.conns = {}
         self.conns_lock = threading.Lock()
+        # Reverse map {socket -> peer_id} so a drop doesn't scan conns
+        self._sock_pid = {}
+
+        # One selector loop thread serves the listener and every peer socket,
+        # so a single receive buffer is enough
+        self._sel = selectors.DefaultSelector()
+        self._rbuf = memoryview(bytearray(RECV_SIZE))
+
+        # Line handlers by message "type", looked up once per line in _on_line
+        self._handlers = {"msg": self._on_msg, "hello": self._on_hello}
+
+        # Outgoing lines waiting for the writer thread: {socket -> deque[bytes]}
+        self._out = {}
+        self._out_cv = threading.Condition()
 
         self.stop = False
+        # set together with stop; periodic waits use it so shutdown wakes them at once
+        self._stop_ev = threading.Event()
         self.last_seq = 0  
+        # Hash of the last roster dialed, to skip unchanged discovery results
+        self._peers_hash = None
+
+        # Persistent keep-alive connection to the server, shared by all REST calls
+        self._http = None
+        self._http_lock = threading.Lock()
 
     # ---------------- REST helper ----------------
     def _conn(self):
-        if self.is_https:
-            return http.client.HTTPSConnection(self.host, self.port, timeout=10)
-        return http.client.HTTPConnection(self.host, self.port, timeout=10)
+        if self._http is None:
+            if self.is_https:
+                self._http = http.client.HTTPSConnection(self.host, self.port, timeout=WATCH_TIMEOUT + 10)
+            else:
+                self._http = http.client.HTTPConnection(self.host, self.port, timeout=WATCH_TIMEOUT + 10)
+        return self._http
+
+    def _close_http(self):
+        if self._http is not None:
+            try:
+                self._http.close()
+            except Exception:
+                pass
+            self._http = None
 
     def _post(self, path, form):
         body = urlencode(form)
@@ -47,19 +127,26 @@ class P2PPeer:
             "Content-Type": "application/x-www-form-urlencoded",
             "Cookie": self.cookie,
             "User-Agent": "P2P-CLI/1.0",
-            "Connection": "close",
+            "Connection": "keep-alive",
         }
-        c = self._conn()
-        c.request("POST", path, body=body, headers=headers)
-        r = c.getresponse()
-        data = r.read()
-        c.close()
-        try:
-            txt = data.decode("utf-8", errors="ignore")
-        except Exception:
-            txt = ""
+        with self._http_lock:
+            # reuse the kept-alive connection; if the server dropped it, reopen once
+            for attempt in range(2):
+                c = self._conn()
+                try:
+                    c.request("POST", path, body=body, headers=headers)
+                    r = c.getresponse()
+                    data = r.read()
+                    break
+                except (http.client.BadStatusLine, ConnectionError):
+                    self._close_http()
+                    if attempt:
+                        raise
+                except Exception:
+                    self._close_http()
+                    raise
         try:
-            js = json.loads(txt) if txt else None
+            js = jloads(data) if data else None
         except Exception:
             js = None
         return r.status, js
@@ -79,71 +166,116 @@ class P2PPeer:
         self._post("/channel/create", {"name": self.channel})
         st, js = self._post("/channel/join", {"name": self.channel, "peer_id": self.peer_id})
         if js and "peers" in js:
-            for pid, info in js["peers"].items():
-                if pid == self.peer_id:
-                    continue
-                if self.peer_id < pid:
-                    self._ensure_connected(pid, info["ip"], int(info["port"]))
+            self._connect_peers(js["peers"])
 
-        # 3) refresh peers periodically (discover newcomers)
+        # 3) follow roster changes (discover newcomers)
         t = threading.Thread(target=self._refresh_loop, daemon=True)
         t.start()
 
+    def _connect_peers(self, peers):
+        # skip the walk when the roster is the one we already dialed
+        h = hash(frozenset((pid, info.get("ip"), str(info.get("port"))) for pid, info in peers.items()))
+        if h == self._peers_hash:
+            return False
+        self._peers_hash = h
+        for pid, info in peers.items():
+            if pid == self.peer_id:
+                continue
+            # single-sided dialing rule
+            if self.peer_id < pid:
+                self._ensure_connected(pid, info["ip"], int(info["port"]))
+        return True
+
     def _refresh_loop(self):
+        # Long-poll /channel/watch: the server answers as soon as the roster
+        # changes. Servers without it (404) are polled via /channel/join,
+        # backing off 2s -> 4s -> 8s while the roster stays the same; other
+        # failures, e.g. a "busy" server, poll once and retry the watch.
+        version = 0
+        backoff = 2.0
+        use_watch = True
         while not self.stop:
             try:
+                if use_watch:
+                    st, js = self._post("/channel/watch", {
+                        "name": self.channel,
+                        "peer_id": self.peer_id,
+                        "since": str(version),
+                        "timeout": str(WATCH_TIMEOUT),
+                    })
+                    if st == 200 and js and js.get("ok") and "version" in js:
+                        version = int(js["version"])
+                        self._connect_peers(js.get("peers", {}))
+                        backoff = 2.0
+                        continue
+                    if st == 404 or (js and js.get("ok") and "version" not in js):
+                        use_watch = False
+
                 st, js = self._post("/channel/join", {"name": self.channel, "peer_id": self.peer_id})
-                if js and "peers" in js:
-                    for pid, info in js["peers"].items():
-                        if pid == self.peer_id:
-                            continue
-                        # single-sided dialing rule
-                        if self.peer_id < pid:
-                            self._ensure_connected(pid, info["ip"], int(info["port"]))
+                if js and "peers" in js and self._connect_peers(js["peers"]):
+                    backoff = 2.0
             except Exception:
                 pass
-            time.sleep(2.0)
+            self._stop_ev.wait(backoff)
+            backoff = min(backoff * 2, 8.0)
 
     # ---------------- P2P listener & connectors ----------------
     def start_listener(self):
-        def serve():
-            srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            try:
-                srv.bind((self.listen_ip, self.listen_port))
-                srv.listen(20)
-                print(f"[{self.peer_id}] listening on {self.listen_ip}:{self.listen_port}")
-                while not self.stop:
-                    try:
-                        s, addr = srv.accept()
+        srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            srv.bind((self.listen_ip, self.listen_port))
+            srv.listen(20)
+        except Exception:
+            srv.close()
+            raise
+        print(f"[{self.peer_id}] listening on {self.listen_ip}:{self.listen_port}")
+        srv.setblocking(False)  # _accept drains the backlog until it would block
+        self._sel.register(srv, selectors.EVENT_READ, None)
+        threading.Thread(target=self._io_loop, args=(srv,), daemon=True).start()
+
+    def _io_loop(self, srv):
+        # readiness loop: accept on the listener, read lines on peer sockets
+        try:
+            while not self.stop:
+                for key, _ in self._sel.select(timeout=0.5):
+                    if key.fileobj is srv:
+                        self._accept(srv)
+                    else:
                         try:
-                            s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-                            s.settimeout(None)  # blocking recv
+                            self._handle_conn(key.fileobj, key.data)
                         except Exception:
-                            pass
-                        # wait for "hello" to learn peer_id, handled in _on_line
-                        t = threading.Thread(target=self._handle_conn, args=(s, f"in:{addr}"), daemon=True)
-                        t.start()
-                    except Exception:
-                        break
-            finally:
-                try:
-                    srv.close()
-                except Exception:
-                    pass
-        threading.Thread(target=serve, daemon=True).start()
+                            # a malformed peer must not take the whole loop down
+                            self._drop_conn(key.fileobj)
+        finally:
+            try:
+                self._sel.unregister(srv)
+            except Exception:
+                pass
+            try:
+                srv.close()
+            except Exception:
+                pass
 
-    def _ensure_connected(self, peer_key, ip, port):
-        with self.conns_lock:
-            if peer_key in self.conns:
+    def _accept(self, srv):
+        # take every pending connection in one wakeup instead of one per select()
+        while True:
+            try:
+                s, addr = srv.accept()
+            except Exception:
                 return
+            tune_socket(s)
+            s.settimeout(None)  # blocking socket; only read when the selector says so
+            # wait for "hello" to learn peer_id, handled in _on_line
+            self._sel.register(s, selectors.EVENT_READ, bytearray())
+
+    def _ensure_connected(self, peer_key, ip, port):
+        if peer_key in self.conns:
+            return
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            try:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-            except Exception:
-                pass
+            tune_socket(s)
 
             # timeout ONLY for connect
             s.settimeout(3.0)
@@ -152,93 +284,157 @@ class P2PPeer:
             s.settimeout(None)
 
 
-            with self.conns_lock:
-                self.conns[peer_key] = s
+            self._set_conn(peer_key, s)
 
             # Send hello so the receiver can map our socket -> our peer_id
-            hello = (json.dumps({"type": "hello", "from": self.peer_id, "chan": self.channel}) + "\n").encode("utf-8")
             try:
-                s.sendall(hello)
+                s.sendall(self._hello)
             except Exception:
                 pass
 
-            threading.Thread(target=self._handle_conn, args=(s, f"out:{peer_key}"), daemon=True).start()
+            self._sel.register(s, selectors.EVENT_READ, bytearray())
             print(f"[{self.peer_id}] connected to {peer_key} at {ip}:{port}")
         except Exception:
+            # dial failed: retry on the next discovery result
+            self._peers_hash = None
             try:
                 s.close()
             except Exception:
                 pass
 
 
-    def _handle_conn(self, s, tag):
-        buf = b""
+    def _set_conn(self, peer_key, s):
+        with self.conns_lock:
+            conns = dict(self.conns)
+            conns[peer_key] = s
+            self.conns = conns
+            self._sock_pid[s] = peer_key
+
+    def _handle_conn(self, s, buf):
+        # called by the selector loop when s is readable; buf holds the partial line
         try:
-            while True:
-                chunk = s.recv(4096)
-                if not chunk:
-                    break
-                buf += chunk
-                while True:
-                    if LINE_SEP in buf:
-                        line, buf = buf.split(LINE_SEP, 1)
-                        self._on_line(line, s)
-                    else:
-                        break
+            n = s.recv_into(self._rbuf)
+        except Exception:
+            n = 0
+        if not n:
+            self._drop_conn(s)
+            return
+        # buf never holds a newline between calls, so only the new bytes need scanning
+        scan = len(buf)
+        buf += self._rbuf[:n]
+        # hand over every complete line as a window on buf (no copy), then
+        # drop them in one go once the view is released
+        start = 0
+        i = buf.find(LINE_SEP, scan)
+        if i < 0:
+            return
+        with memoryview(buf) as mv:
+            while i >= 0:
+                with mv[start:i] as line:
+                    self._on_line(line, s)
+                start = i + 1
+                i = buf.find(LINE_SEP, start)
+        del buf[:start]
+
+    def _drop_conn(self, s):
+        try:
+            self._sel.unregister(s)
+        except Exception:
+            pass
+        # remove the socket from conns if present
+        with self.conns_lock:
+            pid = self._sock_pid.pop(s, None)
+            if pid is not None and self.conns.get(pid) is s:
+                conns = dict(self.conns)
+                del conns[pid]
+                self.conns = conns
+        with self._out_cv:
+            self._out.pop(s, None)
+        # force the next discovery result to be re-dialed
+        self._peers_hash = None
+        try:
+            s.close()
         except Exception:
             pass
-        finally:
-            # remove the socket from conns if present
-            with self.conns_lock:
-                for k, v in list(self.conns.items()):
-                    if v is s:
-                        del self.conns[k]
-                        break
-            try:
-                s.close()
-            except Exception:
-                pass
 
     def _on_line(self, line_bytes, sock):
         try:
-            txt = line_bytes.decode("utf-8", errors="ignore")
-            js = json.loads(txt)
+            js = jloads(line_bytes)
         except Exception:
             return
-
-        typ = js.get("type")
-        if typ == "hello":
-            pid = js.get("from")
-            if pid:
-                with self.conns_lock:
-                    self.conns[pid] = sock
+        if not isinstance(js, dict):
             return
 
-        if typ == "msg":
-            frm = js.get("from", "?")
-            text = js.get("text", "")
-            print(f"\r[{frm}] {text}")
-            return
+        kind = js.get("type")
+        handler = self._handlers.get(kind) if isinstance(kind, str) else None
+        if handler is not None:
+            handler(js, sock)
+
+    def _on_hello(self, js, sock):
+        pid = js.get("from")
+        if pid and isinstance(pid, str):
+            self._set_conn(pid, sock)
 
+    def _on_msg(self, js, sock):
+        frm = js.get("from", "?")
+        text = js.get("text", "")
+        print(f"\r[{frm}] {text}")
 
     # ---------------- Sending ----------------
     def send_all(self, text):
-        payload = {"type": "msg", "chan": self.channel, "from": self.peer_id, "text": text, "ts": now()}
-        raw = (json.dumps(payload) + "\n").encode("utf-8")
-        with self.conns_lock:
-            targets = list(self.conns.values())
-        for s in targets:
-            try:
-                s.sendall(raw)
-            except Exception:
-                pass
+        raw = b"".join((self._msg_prefix, repr(now()).encode(), b',"text":', jtext(text), b"}", LINE_SEP))
+        targets = self.conns.values()
+        # queue for the writer thread, which flushes each peer's backlog in one syscall
+        with self._out_cv:
+            for s in targets:
+                self._out.setdefault(s, deque()).append(raw)
+            self._out_cv.notify()
 
         print(f"[{self.peer_id}] {text}")
 
+    def start_writer(self):
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    def _writer_loop(self):
+        # runs until stop is set and everything queued has been flushed
+        while True:
+            with self._out_cv:
+                while not self.stop and not any(self._out.values()):
+                    self._out_cv.wait(0.5)
+                if self.stop and not any(self._out.values()):
+                    return
+                batches = [(s, list(q)) for s, q in self._out.items() if q]
+                for q in self._out.values():
+                    q.clear()
+            for s, items in batches:
+                try:
+                    self._send_batch(s, items)
+                except Exception:
+                    with self._out_cv:
+                        self._out.pop(s, None)
+
+    @staticmethod
+    def _send_batch(s, items):
+        # gather-write all queued lines; sendall fallback where sendmsg is missing (Windows)
+        if len(items) == 1 or not hasattr(s, "sendmsg"):
+            s.sendall(b"".join(items))
+            return
+        bufs = [memoryview(b) for b in items]
+        while bufs:
+            sent = s.sendmsg(bufs)
+            while sent:
+                if sent >= len(bufs[0]):
+                    sent -= len(bufs.pop(0))
+                else:
+                    bufs[0] = bufs[0][sent:]
+                    sent = 0
+
     # ---------------- Main loop ----------------
     def run(self):
-        # listener + discovery
+        # listener + writer + discovery
         self.start_listener()
+        self.start_writer()
         self.register_and_join()
 
         print(f"[{self.peer_id}] đã vào kênh #{self.channel}. Gõ để chat, /quit để thoát.")
@@ -254,12 +450,17 @@ class P2PPeer:
             pass
         finally:
             self.stop = True
-            with self.conns_lock:
-                for s in self.conns.values():
-                    try:
-                        s.close()
-                    except Exception:
-                        pass
+            self._stop_ev.set()
+            with self._out_cv:
+                self._out_cv.notify()
+            self._writer.join(timeout=2.0)
+            with self._http_lock:
+                self._close_http()
+            for s in self.conns.values():
+                try:
+                    s.close()
+                except Exception:
+                    pass
             print("\nbye.")
 
 def main():
@@ -1,8 +1,11 @@
 import argparse
+import bisect
+import threading
 import time
-from urllib.parse import parse_qs 
+from urllib.parse import parse_qsl
 
 
+from daemon.backend import MAX_WORKERS
 from daemon.weaprous import WeApRous
 
 # -----------------------------
@@ -11,16 +14,32 @@ from daemon.weaprous import WeApRous
 state = {
     "peers": {},      
     "channels": {},   
-    "seq": 0
+    "seq": 0,
+    "roster": 0       # tăng mỗi khi danh sách peer / thành viên kênh thay đổi
 }
 
+# Đánh thức các long-poll /channel/watch khi roster thay đổi
+roster_cv = threading.Condition()
+# Thời gian chờ tối đa (giây) của một long-poll /channel/watch
+WATCH_TIMEOUT = 30.0
+# Số long-poll /channel/watch được chờ cùng lúc; mỗi cái giữ một worker của
+# backend, nên luôn chừa lại một nửa pool cho các request khác
+MAX_WATCHERS = MAX_WORKERS // 2
+watch_slots = threading.BoundedSemaphore(MAX_WATCHERS)
+# Số tin nhắn gần nhất giữ lại cho mỗi kênh (/sync chỉ trả về trong phạm vi này)
+MAX_HISTORY = 10000
+
 def _parse_form(body: str) -> dict:
     """Properly parse x-www-form-urlencoded into a flat dict."""
     if not body:
         return {}
-    qs = parse_qs(body, keep_blank_values=True, encoding="utf-8", errors="strict")
+    # dict() over the pairs keeps the last value of a repeated key
+    return dict(parse_qsl(body, keep_blank_values=True, encoding="utf-8", errors="strict"))
 
-    return {k: (v[-1] if isinstance(v, list) else v) for k, v in qs.items()}
+def _bump_roster():
+    with roster_cv:
+        state["roster"] += 1
+        roster_cv.notify_all()
 
 def _require_auth(headers: dict) -> bool:
     """Yêu cầu có Cookie: auth=true (liên hệ phần 2.1)."""
@@ -54,6 +73,7 @@ def peer_register(headers, body):
     except Exception:
         return {"ok": False, "error": "port must be int"}
     state["peers"][peer_id] = {"ip": ip, "port": port, "last_seen": time.time()}
+    _bump_roster()
     print("[SampleApp] peer_register:", state["peers"][peer_id])
     return {"ok": True, "peers": state["peers"]}
 
@@ -78,7 +98,9 @@ def channel_join(headers, body):
     if not name or not peer_id:
         return {"ok": False, "error": "Missing name/peer_id"}
     ch = state["channels"].setdefault(name, {"members": set(), "messages": []})
-    ch["members"].add(peer_id)
+    if peer_id not in ch["members"]:
+        ch["members"].add(peer_id)
+        _bump_roster()
     # Trả danh sách peers hiện có trong kênh để client có thể kết nối P2P
     members = [p for p in ch["members"] if p in state["peers"]]
     peers_info = {p: state["peers"][p] for p in members}
@@ -86,6 +108,36 @@ def channel_join(headers, body):
 
     return {"ok": True, "peers": peers_info, "members": list(ch["members"])}
 
+@app.route("/channel/watch", methods=["POST"])
+def channel_watch(headers, body):
+    """Long-poll: chờ đến khi roster khác `since` (tối đa `timeout` giây) rồi trả peers của kênh.
+
+    Khi đã có MAX_WATCHERS long-poll đang chờ, trả lỗi "busy" ngay thay vì giữ thêm worker.
+    """
+    if not _require_auth(headers):
+        return {"ok": False, "error": "Unauthorized"}
+    f = _parse_form(body)
+    name = f.get("name")
+    try:
+        since = int(f.get("since", "0"))
+        timeout = min(float(f.get("timeout", WATCH_TIMEOUT)), WATCH_TIMEOUT)
+    except ValueError:
+        return {"ok": False, "error": "since/timeout must be numbers"}
+    if not watch_slots.acquire(blocking=False):
+        return {"ok": False, "error": "busy"}
+    try:
+        with roster_cv:
+            roster_cv.wait_for(lambda: state["roster"] != since, timeout)
+            version = state["roster"]
+    finally:
+        watch_slots.release()
+    ch = state["channels"].get(name)
+    if not ch:
+        return {"ok": False, "error": "Channel not found"}
+    members = [p for p in ch["members"] if p in state["peers"]]
+    peers_info = {p: state["peers"][p] for p in members}
+    return {"ok": True, "version": version, "peers": peers_info}
+
 @app.route("/message", methods=["POST"])
 def send_message(headers, body):
     if not _require_auth(headers):
@@ -99,7 +151,11 @@ def send_message(headers, body):
         return {"ok": False, "error": "Channel not found"}
     state["seq"] += 1
     msg = {"seq": state["seq"], "from": sender, "text": text, "ts": time.time()}
-    ch["messages"].append(msg)
+    msgs = ch["messages"]
+    msgs.append(msg)
+    # cắt bớt theo lô: chi phí xoá đầu list được chia đều cho MAX_HISTORY lần append
+    if len(msgs) > 2 * MAX_HISTORY:
+        del msgs[:-MAX_HISTORY]
     print("[SampleApp] message:", msg)
     return {"ok": True, "seq": state["seq"]}
 
@@ -111,7 +167,9 @@ def sync(headers, body):
     name = f.get("name")
     after = int(f.get("after", "0"))
     ch = state["channels"].get(name, {"messages": []})
-    delta = [m for m in ch["messages"] if int(m.get("seq", 0)) > after]
+    # seq tăng dần trong mỗi kênh -> tìm nhị phân vị trí đầu tiên > after
+    msgs = ch["messages"]
+    delta = msgs[bisect.bisect_right(msgs, after, key=lambda m: m["seq"]):]
     return {"ok": True, "messages": delta}
 
 @app.route("/hello", methods=["PUT"])  
@@ -124,29 +182,13 @@ def hello(headers, body):
     }
     
 
-@app.route("/submit-info", methods=["POST"])
-def submit_info(headers, body):
-    return peer_register(headers, body)
-
-@app.route("/add-list", methods=["POST"])
-def add_list(headers, body):
-    return channel_create(headers, body)
-
-@app.route("/get-list", methods=["POST"])
-def get_list(headers, body):
-    return channel_join(headers, body)
-
-@app.route("/connect-peer", methods=["POST"])
-def connect_peer(headers, body):
-    return channel_join(headers, body)
-
-@app.route("/broadcast-peer", methods=["POST"])
-def broadcast_peer(headers, body):
-    return send_message(headers, body)
-
-@app.route("/send-peer", methods=["POST"])
-def send_peer(headers, body):
-    return send_message(headers, body)
+# Các URL alias trỏ thẳng vào handler gốc trong bảng route (không cần hàm bọc)
+app.alias("/submit-info", "/peer/register")
+app.alias("/add-list", "/channel/create")
+app.alias("/get-list", "/channel/join")
+app.alias("/connect-peer", "/channel/join")
+app.alias("/broadcast-peer", "/message")
+app.alias("/send-peer", "/message")
 
 def main():
     parser = argparse.ArgumentParser()
@@ -0,0 +1,99 @@
+import socket
+import threading
+import time
+import unittest
+
+from daemon import httpadapter
+from daemon.httpadapter import HttpAdapter, reclaim_idle
+
+
+def _adapter():
+    return HttpAdapter("127.0.0.1", 0, None, None, {})
+
+
+class RecvFullHttpTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_complete_request_is_returned(self):
+        raw = b"POST /x HTTP/1.1\r\nContent-Length: 6\r\n\r\nname=r"
+        self.client.sendall(raw)
+        self.assertEqual(_adapter()._recv_full_http(self.server), raw)
+
+    def test_pipelined_request_is_kept_for_next_call(self):
+        first = b"POST /x HTTP/1.1\r\nContent-Length: 6\r\n\r\nname=r"
+        second = b"GET / HTTP/1.1\r\n\r\n"
+        self.client.sendall(first + second)
+        self.client.shutdown(socket.SHUT_WR)
+        adapter = _adapter()
+        self.assertEqual(adapter._recv_full_http(self.server), first)
+        self.assertEqual(adapter._recv_full_http(self.server), second)
+
+    def test_body_cut_short_by_eof_is_dropped(self):
+        self.client.sendall(b"POST /x HTTP/1.1\r\nContent-Length: 20\r\n\r\nname=r")
+        self.client.shutdown(socket.SHUT_WR)
+        self.assertEqual(_adapter()._recv_full_http(self.server), b"")
+
+
+
+class ReclaimIdleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.result = []
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _wait_in_recv(self, reclaimable):
+        t = threading.Thread(target=lambda: self.result.append(
+            _adapter()._recv_full_http(self.server, reclaimable)))
+        t.start()
+        time.sleep(0.2)
+        return t
+
+    def test_idle_keep_alive_connection_is_reclaimed(self):
+        t = self._wait_in_recv(True)
+        self.assertTrue(reclaim_idle())
+        t.join(2)
+        self.assertEqual(self.result, [b""])
+        self.assertFalse(httpadapter._idle)
+
+    def test_new_connection_is_not_reclaimed(self):
+        t = self._wait_in_recv(False)
+        try:
+            self.assertFalse(reclaim_idle())
+        finally:
+            self.client.sendall(b"GET / HTTP/1.1\r\n\r\n")
+            t.join(2)
+        self.assertEqual(self.result, [b"GET / HTTP/1.1\r\n\r\n"])
+
+    def test_request_read_after_reclaim_is_dropped(self):
+        self.client.sendall(b"GET / HTTP/1.1\r\n\r\n")
+        # reclaimed between the idle listing and the worker's check
+        recv_into = self.server.recv_into
+
+        class Conn:
+            def settimeout(self, t):
+                pass
+
+            def recv_into(self, buf):
+                n = recv_into(buf)
+                reclaim_idle()
+                return n
+
+            def shutdown(self, how):
+                pass
+
+        self.assertEqual(_adapter()._recv_full_http(Conn(), True), b"")
+        self.assertFalse(httpadapter._idle)
+
+
+if __name__ == "__main__":
+    unittest.main()
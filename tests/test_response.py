@@ -0,0 +1,31 @@
+import unittest
+
+from daemon.request import Request
+from daemon.response import Response, WWW_DIR
+
+
+def _get(path):
+    req = Request()
+    req.method = "GET"
+    req.path = path
+    return Response().build_response(req)
+
+
+class PathTraversalTest(unittest.TestCase):
+
+    def test_build_content_rejects_parent_path(self):
+        self.assertEqual(Response().build_content("/../start_sampleapp.py", WWW_DIR),
+                         (403, b"403 Forbidden"))
+
+    def test_dotdot_request_gets_403(self):
+        header, body = _get("/../../../etc/hosts.html")
+        self.assertTrue(header.startswith(b"HTTP/1.1 403 "))
+        self.assertEqual(body, b"403 Forbidden")
+
+    def test_path_inside_base_dir_is_served(self):
+        header, _ = _get("/index.html")
+        self.assertTrue(header.startswith(b"HTTP/1.1 200 "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import time
+import unittest
+
+import start_sampleapp as sampleapp
+
+
+class ChannelWatchLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        sampleapp.state["channels"]["room"] = {"members": [], "messages": []}
+        self.headers = {"cookie": "auth=true"}
+
+    def tearDown(self):
+        sampleapp.state["channels"].pop("room", None)
+
+    def _watch(self, timeout):
+        body = "name=room&since={}&timeout={}".format(sampleapp.state["roster"], timeout)
+        return sampleapp.channel_watch(dict(self.headers), body)
+
+    def test_watchers_are_capped_below_worker_pool(self):
+        self.assertLess(sampleapp.MAX_WATCHERS, sampleapp.MAX_WORKERS)
+
+        results = []
+        watchers = [threading.Thread(target=lambda: results.append(self._watch(10)))
+                    for _ in range(sampleapp.MAX_WATCHERS + 1)]
+        start = time.monotonic()
+        for t in watchers:
+            t.start()
+        # long-poll thừa phải bị trả "busy" ngay, các cái còn lại vẫn chờ
+        while not results and time.monotonic() - start < 5:
+            time.sleep(0.01)
+        try:
+            self.assertEqual(results, [{"ok": False, "error": "busy"}])
+            self.assertLess(time.monotonic() - start, 5)
+        finally:
+            sampleapp._bump_roster()
+            for t in watchers:
+                t.join(5)
+
+        self.assertEqual(len(results), sampleapp.MAX_WATCHERS + 1)
+        self.assertEqual(sum(r["ok"] for r in results), sampleapp.MAX_WATCHERS)
+        # slot được trả lại sau khi long-poll kết thúc
+        self.assertTrue(self._watch(0)["ok"])
+
+if __name__ == "__main__":
+    unittest.main()